@@ -0,0 +1,278 @@
+# Copyright 2025 AlQuraishi Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+from openfold3.core.data.io.sequence import msa as msa_io
+from openfold3.core.data.io.sequence.msa import (
+    _read_text_fd,
+    parse_a3m,
+    parse_msas_direct,
+    parse_stockholm,
+    standardize_filepaths,
+)
+
+
+class TestStandardizeFilepaths(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmpdir.name)
+
+        # Two chain directories, each with a nested directory that is not expanded
+        self.chain_a = self.tmp_path / "chain_a"
+        self.chain_b = self.tmp_path / "chain_b"
+        for chain_dir in (self.chain_a, self.chain_b):
+            (chain_dir / "nested").mkdir(parents=True)
+            (chain_dir / "nested" / "deep_hits.a3m").touch()
+        (self.chain_a / "uniref90_hits.a3m").touch()
+        (self.chain_a / "mgnify_hits.sto").touch()
+        (self.chain_b / "bfd_hits.a3m").touch()
+        self.loose_file = self.tmp_path / "loose_hits.sto"
+        self.loose_file.touch()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_directory(self):
+        self.assertCountEqual(
+            standardize_filepaths(self.chain_a),
+            [self.chain_a / "uniref90_hits.a3m", self.chain_a / "mgnify_hits.sto"],
+        )
+
+    def test_file(self):
+        self.assertEqual(standardize_filepaths(self.loose_file), [self.loose_file])
+
+    def test_list_of_files_and_directories(self):
+        self.assertCountEqual(
+            standardize_filepaths([self.chain_a, self.loose_file, self.chain_b]),
+            [
+                self.chain_a / "uniref90_hits.a3m",
+                self.chain_a / "mgnify_hits.sto",
+                self.loose_file,
+                self.chain_b / "bfd_hits.a3m",
+            ],
+        )
+
+    def test_returns_paths(self):
+        for file_path in standardize_filepaths(self.chain_a):
+            self.assertIsInstance(file_path, Path)
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            standardize_filepaths(str(self.chain_a))
+
+
+A3M_STRING = """>query
+ACDEFGH
+>hit_1 some description
+AC-EfgFGH
+>hit_2
+ACDkEF-H
+"""
+
+STO_STRING = """# STOCKHOLM 1.0
+
+query  ACD-EFGH
+hit_1  ACDKEF-H
+hit_2  AC-.EFGH
+
+query  IKLM
+hit_1  IK-M
+hit_2  IKLM
+//
+"""
+
+
+class TestParseMsasDirect(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.chain_dir = Path(self._tmpdir.name)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def write_file(self, name, content, newline="\n"):
+        file_path = self.chain_dir / name
+        with open(file_path, "w", newline="") as f:
+            f.write(content.replace("\n", newline))
+        return file_path
+
+    def assert_msas_equal(self, msa, expected_msa):
+        np.testing.assert_array_equal(msa.msa, expected_msa.msa)
+        np.testing.assert_array_equal(msa.deletion_matrix, expected_msa.deletion_matrix)
+        self.assertEqual(list(msa.metadata), list(expected_msa.metadata))
+
+    def check_matches_text_mode_open(self, newline):
+        a3m_file = self.write_file("uniref90_hits.a3m", A3M_STRING, newline)
+        sto_file = self.write_file("mgnify_hits.sto", STO_STRING, newline)
+        max_seq_counts = {"uniref90_hits": 2, "mgnify_hits": 10}
+
+        msas = parse_msas_direct(
+            standardize_filepaths(self.chain_dir), max_seq_counts=max_seq_counts
+        )
+
+        # Reference: the previous read path through text-mode open()
+        with open(a3m_file) as f:
+            expected_a3m = parse_a3m(f.read(), 2)
+        with open(sto_file) as f:
+            expected_sto = parse_stockholm(f.read(), 10)
+        self.assertCountEqual(msas.keys(), ["uniref90_hits", "mgnify_hits"])
+        self.assert_msas_equal(msas["uniref90_hits"], expected_a3m)
+        self.assert_msas_equal(msas["mgnify_hits"], expected_sto)
+
+    def test_matches_text_mode_open(self):
+        self.check_matches_text_mode_open(newline="\n")
+
+    def test_matches_text_mode_open_crlf(self):
+        self.check_matches_text_mode_open(newline="\r\n")
+
+    def test_crlf_parses_like_lf(self):
+        self.write_file("uniref90_hits.a3m", A3M_STRING, newline="\r\n")
+        crlf_msa = parse_msas_direct(
+            standardize_filepaths(self.chain_dir), {"uniref90_hits": 10}
+        )["uniref90_hits"]
+
+        self.assert_msas_equal(crlf_msa, parse_a3m(A3M_STRING, 10))
+        self.assertEqual(crlf_msa.msa.shape, (3, 7))
+
+    def write_distinct_msas(self):
+        """Writes one MSA per file whose query sequence identifies the file."""
+        queries = {
+            "uniref90_hits.a3m": "AAAA",
+            "bfd_hits.a3m": "CCCC",
+            "mgnify_hits.sto": "DDDD",
+            "uniprot_hits.a3m": "EEEE",
+        }
+        for name, query in queries.items():
+            if name.endswith(".sto"):
+                content = f"# STOCKHOLM 1.0\nquery {query}\n//\n"
+            else:
+                content = f">query\n{query}\n"
+            self.write_file(name, content)
+        self.write_file("notes.txt", ">query\nFFFF\n")
+        return {name.split(".")[0]: query for name, query in queries.items()}
+
+    def test_filtered_files_keep_pairing(self):
+        queries = self.write_distinct_msas()
+        max_seq_counts = {"uniref90_hits": 10, "mgnify_hits": 10, "uniprot_hits": 10}
+
+        # Files filtered out by extension or max_seq_counts are interleaved with the
+        # parsed ones, each MSA must still be read from its own file
+        file_list = sorted(standardize_filepaths(self.chain_dir))
+        with self.assertWarns(UserWarning):  # notes.txt has an unsupported extension
+            msas = parse_msas_direct(file_list, max_seq_counts=max_seq_counts)
+
+        self.assertCountEqual(msas.keys(), max_seq_counts.keys())
+        for name, msa in msas.items():
+            self.assertEqual("".join(msa.msa[0]), queries[name])
+
+    def test_without_max_seq_counts(self):
+        queries = self.write_distinct_msas()
+        (self.chain_dir / "notes.txt").unlink()
+
+        msas = parse_msas_direct(standardize_filepaths(self.chain_dir))
+
+        self.assertCountEqual(msas.keys(), queries.keys())
+        for name, msa in msas.items():
+            self.assertEqual("".join(msa.msa[0]), queries[name])
+
+    def test_without_posix_fadvise(self):
+        queries = self.write_distinct_msas()
+        (self.chain_dir / "notes.txt").unlink()
+
+        # Platforms like macOS don't provide posix_fadvise
+        with patch.object(msa_io, "_posix_fadvise", None):
+            msas = parse_msas_direct(standardize_filepaths(self.chain_dir))
+
+        self.assertCountEqual(msas.keys(), queries.keys())
+        for name, msa in msas.items():
+            self.assertEqual("".join(msa.msa[0]), queries[name])
+
+    def test_requests_readahead_and_closes_files(self):
+        self.write_distinct_msas()
+        (self.chain_dir / "notes.txt").unlink()
+        opened_fds = []
+        real_open = os.open
+
+        def tracking_open(*args, **kwargs):
+            fd = real_open(*args, **kwargs)
+            opened_fds.append(fd)
+            return fd
+
+        with (
+            patch.object(msa_io.os, "open", side_effect=tracking_open),
+            patch.object(msa_io, "_posix_fadvise") as mock_fadvise,
+        ):
+            parse_msas_direct(standardize_filepaths(self.chain_dir))
+
+        self.assertEqual(len(opened_fds), 4)
+        self.assertCountEqual(
+            [c.args[0] for c in mock_fadvise.call_args_list], opened_fds
+        )
+        for fd in opened_fds:
+            with self.assertRaises(OSError):
+                os.fstat(fd)
+
+
+class TestReadTextFd(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmpdir.name)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def read(self, file_path):
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            return _read_text_fd(fd)
+        finally:
+            os.close(fd)
+
+    def test_empty_file(self):
+        file_path = self.tmp_path / "empty.a3m"
+        file_path.touch()
+        self.assertEqual(self.read(file_path), "")
+
+    def test_keeps_line_endings_and_utf8(self):
+        file_path = self.tmp_path / "hits.a3m"
+        file_path.write_bytes(">q \xc3\xa9\r\nACDE\r\n".encode("latin-1"))
+        self.assertEqual(self.read(file_path), ">q \u00e9\r\nACDE\r\n")
+
+    def test_size_differs_from_fstat(self):
+        file_path = self.tmp_path / "hits.sto"
+        file_path.write_text(STO_STRING)
+
+        # Files on network filesystems or that are still being written can report a
+        # stale size, the contents must be read until EOF regardless
+        for reported_size in (0, 1, 7, len(STO_STRING) * 10):
+            with (
+                self.subTest(reported_size=reported_size),
+                patch(
+                    "openfold3.core.data.io.sequence.msa.os.fstat",
+                    return_value=SimpleNamespace(st_size=reported_size),
+                ),
+            ):
+                self.assertEqual(self.read(file_path), STO_STRING)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,8 @@
 """MSA pre-parsing script for AF3 dataset."""
 
 import multiprocessing as mp
+import os
 import traceback
-from functools import wraps
 from pathlib import Path
 from typing import Annotated
 
@@ -15,6 +15,8 @@ from openfold3.core.data.io.sequence.msa import parse_msas_direct, standardize_f
 
 PositiveInt = Annotated[int, Field(gt=0)]
 
+_worker_kwargs: dict = {}
+
 
 class MaxSeqCounts(BaseModel):
     """Maximum sequence counts per alignment database.
@@ -58,7 +60,7 @@ class MaxSeqCounts(BaseModel):
     required=True,
     help="Output directory to which the per-chain MSA npz files are to be saved.",
     type=click.Path(
-        exists=True,
+        exists=False,
         file_okay=False,
         dir_okay=True,
         path_type=Path,
@@ -84,35 +86,138 @@ class MaxSeqCounts(BaseModel):
         " over."
     ),
 )
+@click.option(
+    "--chunksize",
+    default=None,
+    type=click.IntRange(min=1),
+    help=(
+        "Number of chains dispatched to a worker at a time. Defaults to "
+        "max(1, num_chains // (num_workers * 4)). Chains are dealt round-robin from "
+        "the size-sorted list into the batches, so each batch mixes large and small "
+        "chains. Larger values cut the per-task IPC overhead but leave fewer tasks "
+        "to balance the load at the end of the run, 1 gives the finest balancing."
+    ),
+)
+@click.option(
+    "--no_compression",
+    is_flag=True,
+    help=(
+        "Write the npz files without zlib compression. Trades disk space for "
+        "considerably less CPU time per chain."
+    ),
+)
+@click.option(
+    "--overwrite",
+    is_flag=True,
+    help=(
+        "Re-parse chains that already have an npz file in alignment_array_directory. "
+        "By default these are skipped, so that interrupted runs can be resumed."
+    ),
+)
 def main(
     alignments_directory: Path,
     alignment_array_directory: Path,
     max_seq_counts: str,
     num_workers: int,
+    chunksize: int | None,
+    no_compression: bool,
+    overwrite: bool,
 ):
     """Preparse multiple sequence alignments for AF3 dataset."""
     try:
         max_seq_counts = MaxSeqCounts.model_validate_json(max_seq_counts)
     except ValidationError as e:
         raise click.ClickException(f"Invalid max_seq_counts JSON string: {e}") from None
+    # parse_msas_direct expects a plain dict of only the databases to parse
+    max_seq_counts = max_seq_counts.model_dump(exclude_none=True)
+
+    alignment_array_directory.mkdir(parents=True, exist_ok=True)
 
-    rep_chain_dir_iterator = [it.name for it in alignments_directory.iterdir()]
+    rep_chain_ids = [it.name for it in alignments_directory.iterdir()]
 
-    # Create template cache for each query chain
-    wrapped_msa_preparser = _MsaPreparser(
-        alignments_directory, alignment_array_directory, max_seq_counts
+    # Skip chains that were already pre-parsed in a previous run
+    if not overwrite:
+        with os.scandir(alignment_array_directory) as it:
+            done_chain_ids = {
+                entry.name.removesuffix(".npz")
+                for entry in it
+                if entry.name.endswith(".npz")
+            }
+        num_chains = len(rep_chain_ids)
+        rep_chain_ids = [c for c in rep_chain_ids if c not in done_chain_ids]
+        print(f"Skipping {num_chains - len(rep_chain_ids)} already pre-parsed chains.")
+
+    # Sort the chains by size, largest first
+    rep_chain_dir_iterator = sorted(
+        rep_chain_ids,
+        key=lambda name: _get_directory_size(alignments_directory / name),
+        reverse=True,
     )
-    with mp.Pool(num_workers) as pool:
-        for _ in tqdm(
-            pool.imap_unordered(
-                wrapped_msa_preparser,
-                rep_chain_dir_iterator,
-                chunksize=1,
+
+    # Batch several chains per task to amortize the IPC overhead per chain, while
+    # keeping enough tasks per worker for imap_unordered to balance the load
+    if chunksize is None:
+        chunksize = max(1, len(rep_chain_dir_iterator) // (num_workers * 4))
+    rep_chain_batches = _deal_into_batches(rep_chain_dir_iterator, chunksize)
+
+    # Pre-parse the MSAs of each chain, sending the constant arguments to each worker
+    # once on startup instead of with every task. Workers are started from a clean
+    # forkserver process so they don't inherit the parent's threads and memory.
+    ctx = mp.get_context("forkserver")
+    with (
+        ctx.Pool(
+            num_workers,
+            initializer=_init_worker,
+            initargs=(
+                alignments_directory,
+                alignment_array_directory,
+                max_seq_counts,
+                not no_compression,
             ),
+        ) as pool,
+        tqdm(
             total=len(rep_chain_dir_iterator),
             desc="Pre-parsing MSAs",
+            # Refresh at most once per second and report the average rate, as each
+            # batch starts with its largest chains
+            mininterval=1.0,
+            smoothing=0,
+        ) as pbar,
+    ):
+        # The batches are already balanced, so hand them out one at a time
+        for num_parsed in pool.imap_unordered(
+            _preparse_msas_batch_worker, rep_chain_batches, chunksize=1
         ):
-            pass
+            pbar.update(num_parsed)
+
+
+def _deal_into_batches(rep_chain_ids: list[str], batch_size: int) -> list[list[str]]:
+    """Deals size-sorted chains round-robin into batches of about equal total size.
+
+    Slicing the sorted list into contiguous batches would put all of the largest
+    chains into the first batch, handing a single worker the longest task of the run.
+    Dealing them out like cards gives every batch a similar mix of sizes, and keeps
+    the largest chains first within each batch.
+
+    Args:
+        rep_chain_ids:
+            Chain IDs sorted by decreasing size.
+        batch_size:
+            Maximum number of chains per batch.
+
+    Returns:
+        The list of batches of chain IDs.
+    """
+    num_batches = -(-len(rep_chain_ids) // batch_size)
+    return [rep_chain_ids[i::num_batches] for i in range(num_batches)]
+
+
+def _get_directory_size(directory: Path) -> int:
+    """Returns the total size in bytes of the files directly inside a directory."""
+    if not directory.is_dir():
+        return 0
+    with os.scandir(directory) as it:
+        return sum(entry.stat().st_size for entry in it if entry.is_file())
 
 
 def preparse_msas(
@@ -120,63 +225,68 @@ def preparse_msas(
     alignment_array_directory: Path,
     max_seq_counts: dict[str, int],
     rep_pdb_chain_id: str,
+    compressed: bool = True,
 ) -> None:
     file_list = standardize_filepaths(alignments_directory / Path(rep_pdb_chain_id))
     msas = parse_msas_direct(
         file_list=file_list,
         max_seq_counts=max_seq_counts,
     )
-    alignment_array_directory.mkdir(parents=True, exist_ok=True)
 
     msas_preparsed = {}
     for k, v in msas.items():
         msas_preparsed[k] = v.to_dict()
 
-    np.savez_compressed(
-        alignment_array_directory / Path(f"{rep_pdb_chain_id}.npz"), **msas_preparsed
-    )
+    # Write to a temporary file first so that an interrupted write is not mistaken for
+    # a finished chain when resuming
+    output_file = alignment_array_directory / Path(f"{rep_pdb_chain_id}.npz")
+    tmp_output_file = output_file.with_name(f"{output_file.name}.tmp")
+    with open(tmp_output_file, "wb") as f:
+        if compressed:
+            np.savez_compressed(f, **msas_preparsed)
+        else:
+            np.savez(f, **msas_preparsed)
+    tmp_output_file.replace(output_file)
 
 
-class _MsaPreparser:
-    def __init__(
-        self,
-        alignments_directory: Path,
-        alignment_array_directory: Path,
-        max_seq_counts: dict[str, int],
-    ) -> None:
-        """Wrapper class for pre-parsing a directory of raw MSA files.
-
-        This wrapper around `preparse_msas` is needed for multiprocessing, so that we
-        can pass the constant arguments in a convenient way catch any errors that would
-        crash the workers, and change the function call to accept a single Iterable.
-
-        The wrapper is written as a class object because multiprocessing doesn't support
-        decorator-like nested functions.
-
-        Attributes:
-            alignments_directory:
-                Directory containing per-chain folders with multiple sequence
-                alignments.
-            alignment_array_directory:
-                Output directory to which the per-chain MSA npz files are to be saved.
-
-        """
-        self.alignments_directory = alignments_directory
-        self.alignment_array_directory = alignment_array_directory
-        self.max_seq_counts = max_seq_counts
-
-    @wraps(preparse_msas)
-    def __call__(self, rep_pdb_chain_id: str) -> None:
-        try:
-            preparse_msas(
-                self.alignments_directory,
-                self.alignment_array_directory,
-                self.max_seq_counts,
-                rep_pdb_chain_id,
-            )
-        except Exception as e:
-            print(f"Failed to preparse MSAs for chain {rep_pdb_chain_id}:\n{e}\n")
-            traceback.print_exc()
+def _init_worker(
+    alignments_directory: Path,
+    alignment_array_directory: Path,
+    max_seq_counts: dict[str, int],
+    compressed: bool,
+) -> None:
+    """Store the arguments shared by all chains in each worker."""
+    global _worker_kwargs
+    _worker_kwargs = {
+        "alignments_directory": alignments_directory,
+        "alignment_array_directory": alignment_array_directory,
+        "max_seq_counts": max_seq_counts,
+        "compressed": compressed,
+    }
+
+
+def _preparse_msas_worker(rep_pdb_chain_id: str) -> None:
+    """Runs `preparse_msas` for a single chain with the worker's shared arguments.
+
+    Errors are caught and printed so that a single failing chain does not crash the
+    worker.
+    """
+    try:
+        preparse_msas(rep_pdb_chain_id=rep_pdb_chain_id, **_worker_kwargs)
+    except Exception as e:
+        print(f"Failed to preparse MSAs for chain {rep_pdb_chain_id}:\n{e}\n")
+        traceback.print_exc()
+
+
+def _preparse_msas_batch_worker(rep_pdb_chain_ids: list[str]) -> int:
+    """Runs `_preparse_msas_worker` for a batch of chains.
+
+    Returns:
+        The number of chains in the batch, for progress tracking.
+    """
+    for rep_pdb_chain_id in rep_pdb_chain_ids:
+        _preparse_msas_worker(rep_pdb_chain_id)
+    return len(rep_pdb_chain_ids)
 
 
 if __name__ == "__main__":
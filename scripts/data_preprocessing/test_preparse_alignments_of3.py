@@ -0,0 +1,74 @@
+# Copyright 2025 AlQuraishi Laboratory
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from click.testing import CliRunner
+from preparse_alignments_of3 import _deal_into_batches, main
+
+# --- _deal_into_batches tests ---
+
+
+def test_deal_into_batches_even_split():
+    chain_ids = ["a", "b", "c", "d", "e", "f"]
+    assert _deal_into_batches(chain_ids, 2) == [["a", "d"], ["b", "e"], ["c", "f"]]
+
+
+def test_deal_into_batches_uneven_split():
+    chain_ids = ["a", "b", "c", "d", "e", "f", "g"]
+    batches = _deal_into_batches(chain_ids, 3)
+    assert batches == [["a", "d", "g"], ["b", "e"], ["c", "f"]]
+    assert all(len(batch) <= 3 for batch in batches)
+
+
+def test_deal_into_batches_empty():
+    assert _deal_into_batches([], 4) == []
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 3, 5, 10, 50])
+def test_deal_into_batches_keeps_largest_first_order(batch_size):
+    # Chain IDs are named by size rank, 0 being the largest
+    chain_ids = [f"{rank:02d}" for rank in range(23)]
+    batches = _deal_into_batches(chain_ids, batch_size)
+
+    assert sorted(c for batch in batches for c in batch) == chain_ids
+    assert all(len(batch) <= batch_size for batch in batches)
+    for batch in batches:
+        assert batch == sorted(batch)
+    # The largest chains start the batches
+    assert [batch[0] for batch in batches] == chain_ids[: len(batches)]
+
+
+# --- CLI tests ---
+
+
+@pytest.mark.parametrize("chunksize", ["0", "-1"])
+def test_main_rejects_non_positive_chunksize(tmp_path, chunksize):
+    result = CliRunner().invoke(
+        main,
+        [
+            "--alignments_directory",
+            str(tmp_path),
+            "--alignment_array_directory",
+            str(tmp_path / "out"),
+            "--max_seq_counts",
+            '{"uniref90_hits": 10}',
+            "--num_workers",
+            "1",
+            "--chunksize",
+            chunksize,
+        ],
+    )
+    assert result.exit_code == 2
+    assert "--chunksize" in result.output
+    assert not (tmp_path / "out").exists()
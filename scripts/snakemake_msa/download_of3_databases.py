@@ -1,10 +1,21 @@
-import json
 import logging
+import os
+import shutil
 import subprocess as sp
-from argparse import ArgumentParser, Namespace
+import threading
+import time
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, suppress
 from pathlib import Path
 from typing import Final
 
+import boto3
+import botocore
+from boto3.s3.transfer import TransferConfig
+from botocore.client import BaseClient
+from botocore.config import Config as botocoreConfig
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +34,33 @@ HHBLITS_DATABASES: Final[list[str]] = ["uniref30"]
 BFD_DATABASE: Final[str] = "bfd"
 CFDB_DATABASE: Final[str] = "cfdb"
 
+# Written into a .tar.gz database directory once it was fully extracted
+DOWNLOAD_COMPLETE_MARKER: Final[str] = ".download_complete"
+
+SIZE_UNITS: Final[tuple[str, ...]] = ("B", "KB", "MB", "GB", "TB", "PB")
+
+# Multipart settings for a single transfer. Streamed downloads buffer out-of-order
+# parts in memory, so this also bounds the memory used per concurrent download.
+S3_TRANSFER_CONFIG: Final[TransferConfig] = TransferConfig(
+    multipart_chunksize=16 * 1024 * 1024, max_concurrency=16
+)
+
+_s3_client: BaseClient | None = None
+
+# Seconds between progress log messages of a running download
+PROGRESS_LOG_INTERVAL: Final[float] = 30.0
+
+
+class DatabaseDownloadError(RuntimeError):
+    """Error raised when one or more databases failed to download."""
+
+    def __init__(self, failed_dbs: list[str]) -> None:
+        self.failed_dbs = failed_dbs
+        super().__init__(
+            f"Failed to download {len(failed_dbs)} database(s): "
+            f"{', '.join(failed_dbs)}. See the log above for the individual errors."
+        )
+
 
 def get_known_database_info() -> dict[str, str]:
     """Return mapping of archive names to their type (Protein or DNA/RNA)."""
@@ -36,64 +74,182 @@ def get_known_database_info() -> dict[str, str]:
     return known
 
 
-def format_size(size_bytes: float) -> str:
+def format_size(size_bytes: int) -> str:
     """Convert bytes to human-readable size."""
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} PB"
+    # Each unit is 2**10 times the previous one, so the bit length selects the unit
+    unit_index = min(len(SIZE_UNITS) - 1, max(0, (size_bytes.bit_length() - 1) // 10))
+    return f"{size_bytes / (1 << (10 * unit_index)):.1f} {SIZE_UNITS[unit_index]}"
+
+
+def get_gunzip_cmd() -> list[str]:
+    """Return a command decompressing gzip from stdin to stdout, preferring pigz."""
+    if shutil.which("pigz") is not None:
+        return ["pigz", "-dc", "-p", str(os.cpu_count() or 1)]
+    return ["gunzip", "-c"]
+
+
+def get_untar_cmd(output_dir: Path) -> list[str]:
+    """Return a command extracting a .tar.gz from stdin, preferring pigz."""
+    if shutil.which("pigz") is not None:
+        return ["tar", "--use-compress-program=pigz", "-xf", "-", "-C", str(output_dir)]
+    return ["tar", "xzf", "-", "-C", str(output_dir)]
+
+
+def get_s3_client(max_parallel_transfers: int = 1) -> BaseClient:
+    """Return an anonymous S3 client that is shared by all downloads.
+
+    Reusing the client keeps its connection pool alive between transfers. The pool
+    is sized for max_parallel_transfers concurrent transfers of S3_TRANSFER_CONFIG,
+    and the client is re-created if a call asks for more than the current pool
+    holds. Call this once before starting any download threads, as creating clients
+    is not thread-safe.
+    """
+    global _s3_client
+    max_pool_connections = max_parallel_transfers * S3_TRANSFER_CONFIG.max_concurrency
+    if (
+        _s3_client is None
+        or _s3_client.meta.config.max_pool_connections < max_pool_connections
+    ):
+        _s3_client = boto3.client(
+            "s3",
+            config=botocoreConfig(
+                signature_version=botocore.UNSIGNED,
+                max_pool_connections=max_pool_connections,
+            ),
+        )
+    return _s3_client
+
+
+class TransferProgressLogger:
+    """Periodically logs the amount of data downloaded by an S3 transfer.
+
+    Used as the Callback of boto3 transfers, which call it with the number of bytes
+    received since the last call. boto3 calls it from several transfer threads, so
+    the counter is guarded by a lock.
+    """
+
+    def __init__(self, s3_uri: str, interval: float = PROGRESS_LOG_INTERVAL) -> None:
+        self.s3_uri = s3_uri
+        self.interval = interval
+        self.bytes_transferred = 0
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+        self._last_log_time = self._start_time
+
+    def __call__(self, bytes_amount: int) -> None:
+        with self._lock:
+            self.bytes_transferred += bytes_amount
+            now = time.monotonic()
+            if now - self._last_log_time < self.interval:
+                return
+            self._last_log_time = now
+            bytes_transferred = self.bytes_transferred
+        rate = bytes_transferred / max(now - self._start_time, 1e-9)
+        logger.info(
+            f"{self.s3_uri}: {format_size(bytes_transferred)} downloaded "
+            f"({format_size(int(rate))}/s)"
+        )
 
 
-def download_from_s3(*, bucket: str, key: str, destination: str) -> None:
-    """Download a file from S3 using aws cli with progress bar and resume support."""
+def download_from_s3(
+    *,
+    bucket: str,
+    key: str,
+    destination: str | None,
+    unpack_cmd: list[str] | None = None,
+) -> None:
+    """Download a file from S3 using parallel multipart transfers.
+
+    Progress is logged periodically, see TransferProgressLogger.
+
+    If unpack_cmd is given, the download is streamed through that command instead of
+    being written to disk, and the command's output is written to destination. The
+    output is staged in a temporary file that is only moved to destination once the
+    download and unpacking both succeeded. If destination is None, the output of the
+    command is not captured, e.g. for tar extracting into a directory.
+    """
+    s3_client = get_s3_client()
     s3_uri = f"s3://{bucket}/{key}"
-    cmd = ["aws", "s3", "cp", "--no-sign-request", s3_uri, destination]
-    logger.info(f"Downloading {s3_uri} to {destination}")
-    sp.run(cmd, check=True)
+    progress = TransferProgressLogger(s3_uri)
+    if unpack_cmd is None:
+        logger.info(f"Downloading {s3_uri} to {destination}")
+        s3_client.download_file(
+            bucket, key, destination, Config=S3_TRANSFER_CONFIG, Callback=progress
+        )
+        logger.info(f"Downloaded {format_size(progress.bytes_transferred)}: {s3_uri}")
+        return
+
+    logger.info(f"Streaming {s3_uri} through {' '.join(unpack_cmd)}")
+    partial_destination = None if destination is None else Path(f"{destination}.part")
+    with ExitStack() as stack:
+        unpack_stdout = None
+        if partial_destination is not None:
+            unpack_stdout = stack.enter_context(open(partial_destination, "wb"))
+        unpack_proc = sp.Popen(unpack_cmd, stdin=sp.PIPE, stdout=unpack_stdout)
+        try:
+            s3_client.download_fileobj(
+                bucket,
+                key,
+                unpack_proc.stdin,
+                Config=S3_TRANSFER_CONFIG,
+                Callback=progress,
+            )
+        except BrokenPipeError:
+            # The unpacking command exited early, its return code is checked below
+            pass
+        except Exception:
+            unpack_proc.kill()
+            unpack_proc.wait()
+            if partial_destination is not None:
+                partial_destination.unlink(missing_ok=True)
+            raise
+        finally:
+            with suppress(BrokenPipeError):
+                unpack_proc.stdin.close()
+        unpack_returncode = unpack_proc.wait()
+
+    if unpack_returncode != 0:
+        if partial_destination is not None:
+            partial_destination.unlink(missing_ok=True)
+        raise sp.CalledProcessError(unpack_returncode, unpack_cmd)
+
+    if partial_destination is not None:
+        partial_destination.replace(destination)
+    logger.info(f"Downloaded {format_size(progress.bytes_transferred)}: {s3_uri}")
 
 
 def list_databases() -> None:
     """List all objects in the S3 bucket with known database indicators."""
-    cmd = [
-        "aws",
-        "s3api",
-        "list-objects-v2",
-        "--no-sign-request",
-        "--bucket",
-        S3_BUCKET,
-        "--prefix",
-        S3_PREFIX + "/",
-        "--output",
-        "json",
-    ]
-    result = sp.run(cmd, capture_output=True, text=True, check=True)
-    data = json.loads(result.stdout)
-
+    prefix = S3_PREFIX + "/"
     known_dbs = get_known_database_info()
+    paginator = get_s3_client().get_paginator("list_objects_v2")
 
+    # Collect rows and track the column widths in a single pass
+    headers = ("Filename", "Size", "Type", "Known")
+    col_widths = [len(h) for h in headers]
     rows = []
-    for obj in data.get("Contents", []):
-        key = obj["Key"]
-        filename = key.removeprefix(S3_PREFIX + "/")
-        if not filename:  # Skip the prefix itself
-            continue
-        size_bytes = obj["Size"]
-        db_type = known_dbs.get(filename, "")
-        known = "✓" if filename in known_dbs else ""
-        rows.append((filename, format_size(size_bytes), db_type, known))
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            filename = obj["Key"].removeprefix(prefix)
+            if not filename:  # Skip the prefix itself
+                continue
+            db_type = known_dbs.get(filename)
+            row = (
+                filename,
+                format_size(obj["Size"]),
+                db_type or "",
+                "✓" if db_type else "",
+            )
+            rows.append(row)
+            for i, cell in enumerate(row):
+                if len(cell) > col_widths[i]:
+                    col_widths[i] = len(cell)
 
     # Print table
     if not rows:
         print("No objects found in bucket.")
         return
 
-    # Calculate column widths
-    headers = ("Filename", "Size", "Type", "Known")
-    col_widths = [
-        max(len(headers[i]), max(len(r[i]) for r in rows)) for i in range(len(headers))
-    ]
-
     # Print header
     header_line = "  ".join(h.ljust(w) for h, w in zip(headers, col_widths))
     print(header_line)
@@ -104,6 +260,14 @@ def list_databases() -> None:
         print("  ".join(cell.ljust(w) for cell, w in zip(row, col_widths)))
 
 
+def positive_int(value: str) -> int:
+    """Parse a command line argument as an integer of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def parse_args() -> Namespace:
     parser = ArgumentParser(description="OpenFold3 database downloader")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -134,10 +298,59 @@ def parse_args() -> Namespace:
         help=f"HHblits databases to download. Defaults to: {HHBLITS_DATABASES}. "
         "Use --download-bfd and --download-cfdb to add those databases.",
     )
+    download_parser.add_argument(
+        "--max-parallel-downloads",
+        type=positive_int,
+        default=4,
+        help="Maximum number of databases to download and unpack concurrently.",
+    )
 
     return parser.parse_args()
 
 
+def download_fasta_database(db: str, base_outdir: Path) -> None:
+    """Download a single .fasta.gz database, unzipping it on the fly."""
+    db_dir = base_outdir / db
+    fasta = db_dir / f"{db}.fasta"
+    if fasta.exists():
+        logger.info(f"{db} exists, skipping")
+        return
+    db_dir.mkdir(exist_ok=True, parents=True)
+    logger.info(f"Downloading and unzipping {db}...")
+    download_from_s3(
+        bucket=S3_BUCKET,
+        key=f"{S3_PREFIX}/{db}.fasta.gz",
+        destination=str(fasta),
+        unpack_cmd=get_gunzip_cmd(),
+    )
+
+
+def download_archive_database(db: str, base_outdir: Path) -> None:
+    """Download a single .tar.gz database, extracting it on the fly."""
+    db_dir = base_outdir / db
+    # The directory alone doesn't tell whether a previous extraction finished
+    done_marker = db_dir / DOWNLOAD_COMPLETE_MARKER
+    if done_marker.exists():
+        logger.info(f"{db} exists, skipping")
+        return
+    if db_dir.is_dir() and any(db_dir.iterdir()):
+        logger.warning(
+            f"{db_dir} is not empty but has no {DOWNLOAD_COMPLETE_MARKER} marker, so "
+            f"{db} will be downloaded and extracted again. If it is a complete "
+            "install from an older version of this script, stop now and run "
+            f"'touch {done_marker}' to keep it."
+        )
+    db_dir.mkdir(exist_ok=True, parents=True)
+    logger.info(f"Downloading and extracting {db}...")
+    download_from_s3(
+        bucket=S3_BUCKET,
+        key=f"{S3_PREFIX}/{db}.tar.gz",
+        destination=None,
+        unpack_cmd=get_untar_cmd(base_outdir),
+    )
+    done_marker.touch()
+
+
 def download(args: Namespace) -> None:
     base_outdir = Path(args.output_dir)
     base_outdir.mkdir(exist_ok=True, parents=True)
@@ -153,23 +366,6 @@ def download(args: Namespace) -> None:
         jackhmmer_dbs += list(RNA_DATABASES)
         logger.info(f"Including RNA databases: {RNA_DATABASES}")
 
-    # Download jackhmmer databases
-    for db in jackhmmer_dbs:
-        output_filename = f"{base_outdir}/{db}/{db}.fasta.gz"
-        if Path(output_filename).with_suffix("").exists():
-            logger.info(f"{db} exists, skipping")
-            continue
-        outpath_db = Path(f"{base_outdir}/{db}/")
-        outpath_db.mkdir(exist_ok=True, parents=True)
-        logger.info(f"Downloading {db}...")
-        download_from_s3(
-            bucket=S3_BUCKET,
-            key=f"{S3_PREFIX}/{db}.fasta.gz",
-            destination=output_filename,
-        )
-        logger.info(f"Unzipping {db}...")
-        sp.run(["gunzip", output_filename], check=True)
-
     # Build list of hhblits databases
     if args.hhblits_dbs is not None:
         hhblits_dbs = list(args.hhblits_dbs)
@@ -181,27 +377,35 @@ def download(args: Namespace) -> None:
             hhblits_dbs.append(CFDB_DATABASE)
     logger.info(f"HHblits databases to process: {hhblits_dbs}")
 
-    # Download hhblits databases
-    for db in hhblits_dbs:
-        output_filename = f"{base_outdir}/{db}/{db}.tar.gz"
-        if Path(output_filename).parent.exists():
-            logger.info(f"{db} exists, skipping")
-            continue
-        outpath_db = Path(f"{base_outdir}/{db}/")
-        outpath_db.mkdir(exist_ok=True, parents=True)
-        logger.info(f"Downloading {db}...")
-        download_from_s3(
-            bucket=S3_BUCKET,
-            key=f"{S3_PREFIX}/{db}.tar.gz",
-            destination=output_filename,
-        )
-        logger.info(f"Extracting {db}...")
-        sp.run(
-            ["tar", "xzf", output_filename, "-C", str(outpath_db.parent)],
-            check=True,
+    # Create the shared client up front, before it is used from several threads
+    get_s3_client(args.max_parallel_downloads)
+
+    # Download and unpack all databases concurrently, the transfers are bound by
+    # network and disk bandwidth rather than by a single stream
+    failed_dbs = []
+    with ThreadPoolExecutor(max_workers=args.max_parallel_downloads) as executor:
+        future_to_db = {
+            executor.submit(download_fasta_database, db, base_outdir): db
+            for db in jackhmmer_dbs
+        }
+        future_to_db.update(
+            {
+                executor.submit(download_archive_database, db, base_outdir): db
+                for db in hhblits_dbs
+            }
         )
-        # tar does not clean up, so manually delete
-        Path(output_filename).unlink()
+        # Report each failure as soon as it happens rather than after all earlier
+        # downloads finished, and keep going with the other databases
+        for future in as_completed(future_to_db):
+            db = future_to_db[future]
+            try:
+                future.result()
+            except Exception:
+                logger.exception(f"Failed to download {db}")
+                failed_dbs.append(db)
+
+    if failed_dbs:
+        raise DatabaseDownloadError(failed_dbs)
 
 
 def main() -> None:
@@ -12,18 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
+import gzip
+import subprocess as sp
 import tempfile
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 from download_of3_databases import (
+    DOWNLOAD_COMPLETE_MARKER,
     S3_PREFIX,
+    S3_TRANSFER_CONFIG,
+    DatabaseDownloadError,
+    TransferProgressLogger,
     download,
     download_from_s3,
     format_size,
+    get_s3_client,
     list_databases,
     parse_args,
 )
@@ -39,6 +46,7 @@ def make_download_args(
     download_rna_dbs=False,
     jackhmmer_dbs=None,
     hhblits_dbs=None,
+    max_parallel_downloads=1,
 ):
     """Create a Namespace with download args, using sensible defaults."""
     return Namespace(
@@ -48,6 +56,7 @@ def make_download_args(
         download_rna_dbs=download_rna_dbs,
         jackhmmer_dbs=jackhmmer_dbs if jackhmmer_dbs is not None else [],
         hhblits_dbs=hhblits_dbs,
+        max_parallel_downloads=max_parallel_downloads,
     )
 
 
@@ -57,12 +66,16 @@ def make_download_args(
 @pytest.mark.parametrize(
     "size_bytes,expected",
     [
+        (0, "0.0 B"),
         (500, "500.0 B"),
+        (1023, "1023.0 B"),
         (1024, "1.0 KB"),
         (2048, "2.0 KB"),
         (1024 * 1024, "1.0 MB"),
         (1024 * 1024 * 1024, "1.0 GB"),
         (1024 * 1024 * 1024 * 1024, "1.0 TB"),
+        (1024**5, "1.0 PB"),
+        (2048 * 1024**5, "2048.0 PB"),
     ],
 )
 def test_format_size(size_bytes, expected):
@@ -88,6 +101,7 @@ def test_parse_args_download_defaults():
     assert args.download_rna_dbs is False
     assert args.jackhmmer_dbs is None
     assert args.hhblits_dbs is None
+    assert args.max_parallel_downloads == 4
 
 
 def test_parse_args_download_custom_output_dir():
@@ -110,6 +124,21 @@ def test_parse_args_download_flag(flag, attr):
     assert getattr(args, attr) is True
 
 
+def test_parse_args_max_parallel_downloads():
+    with patch("sys.argv", ["script", "download", "--max-parallel-downloads", "8"]):
+        args = parse_args()
+    assert args.max_parallel_downloads == 8
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "two"])
+def test_parse_args_rejects_invalid_max_parallel_downloads(value):
+    with (
+        patch("sys.argv", ["script", "download", "--max-parallel-downloads", value]),
+        pytest.raises(SystemExit),
+    ):
+        parse_args()
+
+
 def test_parse_args_custom_jackhmmer_dbs():
     with patch(
         "sys.argv", ["script", "download", "--jackhmmer-dbs", "uniref90", "pdb_seqres"]
@@ -127,28 +156,112 @@ def test_parse_args_custom_hhblits_dbs():
 # --- download_from_s3 tests ---
 
 
-def test_download_from_s3_command():
-    with patch("download_of3_databases.sp.run") as mock_run:
+def test_get_s3_client_sizes_pool_for_parallel_transfers():
+    with patch("download_of3_databases._s3_client", None):
+        client = get_s3_client(2)
+        assert client.meta.config.max_pool_connections == (
+            2 * S3_TRANSFER_CONFIG.max_concurrency
+        )
+        # Smaller requests reuse the existing client
+        assert get_s3_client() is client
+        # Larger requests re-create it with a bigger pool
+        larger_client = get_s3_client(8)
+        assert larger_client is not client
+        assert larger_client.meta.config.max_pool_connections == (
+            8 * S3_TRANSFER_CONFIG.max_concurrency
+        )
+
+
+def test_download_sizes_s3_client_from_max_parallel_downloads():
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        patch("download_of3_databases.get_s3_client") as mock_get_client,
+        patch("download_of3_databases.download_from_s3"),
+    ):
+        args = make_download_args(
+            tmpdir, jackhmmer_dbs=["uniref90"], hhblits_dbs=[], max_parallel_downloads=6
+        )
+        download(args)
+
+        mock_get_client.assert_called_once_with(6)
+
+
+def test_download_from_s3_uses_shared_client():
+    with patch("download_of3_databases.get_s3_client") as mock_get_client:
         download_from_s3(
             bucket="test-bucket", key="path/file.gz", destination="/tmp/file.gz"
         )
-        mock_run.assert_called_once_with(
-            [
-                "aws",
-                "s3",
-                "cp",
-                "--no-sign-request",
-                "s3://test-bucket/path/file.gz",
-                "/tmp/file.gz",
-            ],
-            check=True,
-        )
+        mock_download_file = mock_get_client.return_value.download_file
+        mock_download_file.assert_called_once()
+        args, kwargs = mock_download_file.call_args
+        assert args == ("test-bucket", "path/file.gz", "/tmp/file.gz")
+        assert kwargs["Config"] is S3_TRANSFER_CONFIG
+        assert isinstance(kwargs["Callback"], TransferProgressLogger)
+
+
+def test_transfer_progress_logger_logs_periodically(caplog):
+    with (
+        patch("download_of3_databases.time.monotonic", side_effect=[0.0, 1.0, 64.0]),
+        caplog.at_level("INFO"),
+    ):
+        progress = TransferProgressLogger("s3://test-bucket/file.gz", interval=60.0)
+        progress(1024)  # Within the interval, not logged
+        progress(1024)
+
+    assert progress.bytes_transferred == 2048
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages == ["s3://test-bucket/file.gz: 2.0 KB downloaded (32.0 B/s)"]
+
+
+def test_transfer_progress_logger_counts_bytes_from_threads():
+    progress = TransferProgressLogger("s3://test-bucket/file.gz")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for _ in range(1000):
+            executor.submit(progress, 3)
+
+    assert progress.bytes_transferred == 3000
 
 
 # --- list_databases tests ---
 
 
-def test_list_databases_parses_s3_json_output(capsys):
+def _mock_s3_listing(pages):
+    """Return a mock S3 client whose list_objects_v2 paginator yields `pages`."""
+    mock_client = MagicMock()
+    mock_client.get_paginator.return_value.paginate.return_value = iter(pages)
+    return mock_client
+
+
+def test_list_databases_reads_all_pages(capsys):
+    pages = [
+        {"Contents": [{"Key": "alignment_databases/uniref90.fasta.gz", "Size": 1}]},
+        {"Contents": [{"Key": "alignment_databases/bfd.tar.gz", "Size": 2}]},
+        {},
+    ]
+    mock_client = _mock_s3_listing(pages)
+
+    with patch("download_of3_databases.get_s3_client", return_value=mock_client):
+        list_databases()
+
+    mock_client.get_paginator.assert_called_once_with("list_objects_v2")
+    mock_client.get_paginator.return_value.paginate.assert_called_once_with(
+        Bucket="openfold", Prefix=f"{S3_PREFIX}/"
+    )
+    captured = capsys.readouterr()
+    assert "uniref90.fasta.gz" in captured.out
+    assert "bfd.tar.gz" in captured.out
+
+
+def test_list_databases_empty_bucket(capsys):
+    with patch(
+        "download_of3_databases.get_s3_client", return_value=_mock_s3_listing([{}])
+    ):
+        list_databases()
+
+    assert "No objects found in bucket." in capsys.readouterr().out
+
+
+def test_list_databases_parses_s3_listing(capsys):
     mock_json = {
         "Contents": [
             {"Key": "alignment_databases/test.fasta.gz", "Size": 1234567890},
@@ -156,10 +269,10 @@ def test_list_databases_parses_s3_json_output(capsys):
         ]
     }
 
-    mock_result = MagicMock()
-    mock_result.stdout = json.dumps(mock_json)
-
-    with patch("download_of3_databases.sp.run", return_value=mock_result):
+    with patch(
+        "download_of3_databases.get_s3_client",
+        return_value=_mock_s3_listing([mock_json]),
+    ):
         list_databases()
 
     captured = capsys.readouterr()
@@ -176,10 +289,10 @@ def test_list_databases_shows_human_readable_sizes(capsys):
         ]
     }
 
-    mock_result = MagicMock()
-    mock_result.stdout = json.dumps(mock_json)
-
-    with patch("download_of3_databases.sp.run", return_value=mock_result):
+    with patch(
+        "download_of3_databases.get_s3_client",
+        return_value=_mock_s3_listing([mock_json]),
+    ):
         list_databases()
 
     captured = capsys.readouterr()
@@ -194,10 +307,10 @@ def test_list_databases_shows_type_column(capsys):
         ]
     }
 
-    mock_result = MagicMock()
-    mock_result.stdout = json.dumps(mock_json)
-
-    with patch("download_of3_databases.sp.run", return_value=mock_result):
+    with patch(
+        "download_of3_databases.get_s3_client",
+        return_value=_mock_s3_listing([mock_json]),
+    ):
         list_databases()
 
     captured = capsys.readouterr()
@@ -205,6 +318,30 @@ def test_list_databases_shows_type_column(capsys):
     assert "DNA/RNA" in captured.out  # rfam is DNA/RNA
 
 
+def test_list_databases_aligns_columns(capsys):
+    mock_json = {
+        "Contents": [
+            {"Key": "alignment_databases/", "Size": 0},
+            {"Key": "alignment_databases/a_very_long_unknown_name.bin", "Size": 10},
+            {"Key": "alignment_databases/rfam.fasta.gz", "Size": 2000},
+        ]
+    }
+
+    with patch(
+        "download_of3_databases.get_s3_client",
+        return_value=_mock_s3_listing([mock_json]),
+    ):
+        list_databases()
+
+    lines = capsys.readouterr().out.splitlines()
+    header, rows = lines[0], lines[2:]
+    assert len(rows) == 2  # the prefix itself is skipped
+    type_column = header.index("Type")
+    assert rows[0][type_column:].strip() == ""  # unknown db has no type or marker
+    assert rows[1][type_column:].startswith("DNA/RNA")
+    assert rows[1].rstrip().endswith("✓")
+
+
 # --- download jackhmmer tests ---
 
 
@@ -260,6 +397,85 @@ def test_download_includes_rna_dbs_when_flag_set():
         assert f"{S3_PREFIX}/rnacentral.fasta.gz" in downloaded_keys
 
 
+def test_download_parallel_downloads_all_databases():
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        patch("download_of3_databases.download_from_s3") as mock_download,
+    ):
+        args = make_download_args(
+            tmpdir,
+            jackhmmer_dbs=["uniref90", "pdb_seqres", "mgnify"],
+            hhblits_dbs=["uniref30", "bfd"],
+            max_parallel_downloads=4,
+        )
+        download(args)
+
+        downloaded_keys = {c.kwargs["key"] for c in mock_download.call_args_list}
+        assert downloaded_keys == {
+            f"{S3_PREFIX}/uniref90.fasta.gz",
+            f"{S3_PREFIX}/pdb_seqres.fasta.gz",
+            f"{S3_PREFIX}/mgnify.fasta.gz",
+            f"{S3_PREFIX}/uniref30.tar.gz",
+            f"{S3_PREFIX}/bfd.tar.gz",
+        }
+
+
+def test_download_raises_failed_parallel_download():
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        patch(
+            "download_of3_databases.download_from_s3",
+            side_effect=sp.CalledProcessError(1, "aws"),
+        ),
+    ):
+        args = make_download_args(
+            tmpdir, jackhmmer_dbs=["uniref90"], hhblits_dbs=[], max_parallel_downloads=2
+        )
+        with pytest.raises(DatabaseDownloadError) as exc_info:
+            download(args)
+
+        assert exc_info.value.failed_dbs == ["uniref90"]
+
+
+def test_download_reports_every_failed_download(caplog):
+    def fail_some_downloads(*, bucket, key, destination, unpack_cmd=None):
+        if "mgnify" in key:
+            raise sp.CalledProcessError(1, "gunzip")
+        if "bfd" in key:
+            raise RuntimeError("connection lost")
+
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        patch(
+            "download_of3_databases.download_from_s3",
+            side_effect=fail_some_downloads,
+        ) as mock_download,
+        caplog.at_level("ERROR"),
+    ):
+        args = make_download_args(
+            tmpdir,
+            jackhmmer_dbs=["mgnify", "uniref90"],
+            hhblits_dbs=["bfd", "uniref30"],
+            max_parallel_downloads=2,
+        )
+        with pytest.raises(DatabaseDownloadError) as exc_info:
+            download(args)
+
+    # The other databases are still downloaded
+    assert mock_download.call_count == 4
+    assert sorted(exc_info.value.failed_dbs) == ["bfd", "mgnify"]
+    assert "bfd" in str(exc_info.value)
+    assert "mgnify" in str(exc_info.value)
+
+    # Every failure is logged with its database name and traceback
+    error_records = [r for r in caplog.records if r.levelname == "ERROR"]
+    assert sorted(r.getMessage() for r in error_records) == [
+        "Failed to download bfd",
+        "Failed to download mgnify",
+    ]
+    assert all(r.exc_info is not None for r in error_records)
+
+
 # --- download hhblits tests ---
 
 
@@ -269,9 +485,10 @@ def test_download_skips_existing_hhblits_databases():
         patch("download_of3_databases.sp.run"),
         patch("download_of3_databases.download_from_s3") as mock_download,
     ):
-        # Create existing directory (signals database exists)
+        # Create completion marker (signals database exists)
         db_dir = Path(tmpdir) / "uniref30"
         db_dir.mkdir()
+        (db_dir / DOWNLOAD_COMPLETE_MARKER).touch()
 
         args = make_download_args(tmpdir)
         download(args)
@@ -281,6 +498,69 @@ def test_download_skips_existing_hhblits_databases():
             assert "uniref30" not in call_args.kwargs.get("key", "")
 
 
+def test_download_resumes_incomplete_hhblits_databases():
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        patch("download_of3_databases.download_from_s3") as mock_download,
+    ):
+        # Directory left behind by an interrupted extraction, without marker
+        db_dir = Path(tmpdir) / "uniref30"
+        db_dir.mkdir()
+
+        args = make_download_args(tmpdir)
+        download(args)
+
+        downloaded_keys = [c.kwargs["key"] for c in mock_download.call_args_list]
+        assert downloaded_keys == [f"{S3_PREFIX}/uniref30.tar.gz"]
+        assert (db_dir / DOWNLOAD_COMPLETE_MARKER).exists()
+
+
+def test_download_warns_about_unmarked_hhblits_databases(caplog):
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        patch("download_of3_databases.download_from_s3"),
+        caplog.at_level("WARNING"),
+    ):
+        # Complete install from an older version of the script, without marker
+        db_dir = Path(tmpdir) / "uniref30"
+        db_dir.mkdir()
+        (db_dir / "uniref30_a3m.ffdata").touch()
+
+        download(make_download_args(tmpdir))
+
+    warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+    assert len(warnings) == 1
+    assert DOWNLOAD_COMPLETE_MARKER in warnings[0]
+    assert "touch" in warnings[0]
+
+
+def test_download_does_not_warn_about_empty_hhblits_directory(caplog):
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        patch("download_of3_databases.download_from_s3"),
+        caplog.at_level("WARNING"),
+    ):
+        (Path(tmpdir) / "uniref30").mkdir()
+        download(make_download_args(tmpdir))
+
+    assert not [r for r in caplog.records if r.levelname == "WARNING"]
+
+
+def test_download_does_not_mark_failed_hhblits_databases():
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        patch(
+            "download_of3_databases.download_from_s3",
+            side_effect=sp.CalledProcessError(2, "tar"),
+        ),
+    ):
+        args = make_download_args(tmpdir, hhblits_dbs=["testdb"])
+        with pytest.raises(DatabaseDownloadError):
+            download(args)
+
+        assert not (Path(tmpdir) / "testdb" / DOWNLOAD_COMPLETE_MARKER).exists()
+
+
 @pytest.mark.parametrize(
     "flag_name,db_name",
     [
@@ -333,26 +613,134 @@ def test_download_custom_hhblits_dbs_ignores_bfd_cfdb_flags():
 def test_download_gunzip_called_for_jackhmmer_dbs():
     with (
         tempfile.TemporaryDirectory() as tmpdir,
-        patch("download_of3_databases.sp.run") as mock_run,
-        patch("download_of3_databases.download_from_s3"),
+        patch("download_of3_databases.shutil.which", return_value=None),
+        patch("download_of3_databases.download_from_s3") as mock_download,
     ):
         args = make_download_args(tmpdir, jackhmmer_dbs=["uniref90"], hhblits_dbs=[])
         download(args)
 
-        gunzip_calls = [c for c in mock_run.call_args_list if "gunzip" in c[0][0]]
-        assert len(gunzip_calls) == 1
+        mock_download.assert_called_once()
+        call_kwargs = mock_download.call_args.kwargs
+        assert call_kwargs["unpack_cmd"][0] == "gunzip"
+        assert call_kwargs["destination"] == f"{tmpdir}/uniref90/uniref90.fasta"
 
 
 def test_download_tar_called_for_hhblits_dbs():
     with (
         tempfile.TemporaryDirectory() as tmpdir,
-        patch("download_of3_databases.sp.run") as mock_run,
-        patch("download_of3_databases.download_from_s3"),
-        patch.object(Path, "unlink"),
+        patch("download_of3_databases.shutil.which", return_value=None),
+        patch("download_of3_databases.download_from_s3") as mock_download,
     ):
         args = make_download_args(tmpdir, hhblits_dbs=["testdb"])
         download(args)
 
-        tar_calls = [c for c in mock_run.call_args_list if c[0][0][0] == "tar"]
-        assert len(tar_calls) == 1
-        assert "xzf" in tar_calls[0][0][0]
+        mock_download.assert_called_once()
+        call_kwargs = mock_download.call_args.kwargs
+        assert call_kwargs["unpack_cmd"][0] == "tar"
+        assert "xzf" in call_kwargs["unpack_cmd"]
+        assert call_kwargs["destination"] is None
+
+
+def test_download_uses_pigz_when_available():
+    with (
+        tempfile.TemporaryDirectory() as tmpdir,
+        patch("download_of3_databases.shutil.which", return_value="/usr/bin/pigz"),
+        patch("download_of3_databases.download_from_s3") as mock_download,
+    ):
+        args = make_download_args(
+            tmpdir, jackhmmer_dbs=["uniref90"], hhblits_dbs=["testdb"]
+        )
+        download(args)
+
+        unpack_cmds = {
+            c.kwargs["key"]: c.kwargs["unpack_cmd"]
+            for c in mock_download.call_args_list
+        }
+        assert unpack_cmds[f"{S3_PREFIX}/uniref90.fasta.gz"][:2] == ["pigz", "-dc"]
+        assert (
+            "--use-compress-program=pigz" in unpack_cmds[f"{S3_PREFIX}/testdb.tar.gz"]
+        )
+
+
+# --- streaming download tests ---
+
+
+def _s3_client_serving(source_file):
+    """Return a mock S3 client that serves every object from a local file."""
+
+    def download_fileobj(bucket, key, fileobj, Config=None, Callback=None):
+        data = Path(source_file).read_bytes()
+        fileobj.write(data)
+        if Callback is not None:
+            Callback(len(data))
+
+    mock_client = MagicMock()
+    mock_client.download_fileobj.side_effect = download_fileobj
+    return mock_client
+
+
+def test_download_from_s3_streams_through_unpack_cmd():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "test.fasta.gz"
+        with gzip.open(source_file, "wt") as f:
+            f.write(">seq\nACGT\n")
+        destination = Path(tmpdir) / "test.fasta"
+
+        with patch(
+            "download_of3_databases.get_s3_client",
+            return_value=_s3_client_serving(source_file),
+        ):
+            download_from_s3(
+                bucket="test-bucket",
+                key="path/test.fasta.gz",
+                destination=str(destination),
+                unpack_cmd=["gunzip", "-c"],
+            )
+
+        assert destination.read_text() == ">seq\nACGT\n"
+        assert not Path(f"{destination}.part").exists()
+
+
+def test_download_from_s3_removes_partial_output_on_unpack_failure():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_file = Path(tmpdir) / "not_gzipped.fasta.gz"
+        source_file.write_text(">seq\nACGT\n")
+        destination = Path(tmpdir) / "test.fasta"
+
+        with (
+            patch(
+                "download_of3_databases.get_s3_client",
+                return_value=_s3_client_serving(source_file),
+            ),
+            pytest.raises(sp.CalledProcessError),
+        ):
+            download_from_s3(
+                bucket="test-bucket",
+                key="path/test.fasta.gz",
+                destination=str(destination),
+                unpack_cmd=["gunzip", "-c"],
+            )
+
+        assert not destination.exists()
+        assert not Path(f"{destination}.part").exists()
+
+
+def test_download_from_s3_removes_partial_output_on_download_failure():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        destination = Path(tmpdir) / "test.fasta"
+        mock_client = MagicMock()
+        mock_client.download_fileobj.side_effect = RuntimeError("connection lost")
+
+        with (
+            patch("download_of3_databases.get_s3_client", return_value=mock_client),
+            pytest.raises(RuntimeError, match="connection lost"),
+        ):
+            download_from_s3(
+                bucket="test-bucket",
+                key="path/test.fasta.gz",
+                destination=str(destination),
+                unpack_cmd=["gunzip", "-c"],
+            )
+
+        assert not destination.exists()
+        assert not Path(f"{destination}.part").exists()